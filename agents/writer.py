@@ -7,19 +7,49 @@ based on provided style guides and newsletter context.
 
 from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
-from pydantic import BaseModel, ValidationError
+import hashlib
+import os
+import tempfile
+from html import escape
+from pydantic import BaseModel, ConfigDict, ValidationError
 from mirascope.core import openai, prompt_template
 from mirascope.integrations.tenacity import collect_errors
-from tenacity import retry, wait_exponential
+from tenacity import retry, stop_after_attempt, wait_exponential
 from base import OpenAIAgent
 from tools.discord_reader import DiscordContentReader
 import asyncio
 
 class WriterBase(OpenAIAgent):
+    class Item(BaseModel):
+        """A single summarized piece of content within a category"""
+        model_config = ConfigDict(extra="forbid")
+
+        order: int
+        original_content: str = ""
+        summary: str
+        links: List[str] = []
+
+        @property
+        def primary_link(self) -> str:
+            return self.links[0] if self.links else "No link"
+
+    class Category(BaseModel):
+        """A newsletter section and its items"""
+        model_config = ConfigDict(extra="forbid")
+
+        name: str
+        items: List['Item']
+
+        @property
+        def ordered_items(self) -> List['WriterBase.Item']:
+            return sorted(self.items, key=lambda item: item.order)
+
     class ContentOutput(BaseModel):
         """Structure for categorized content output"""
-        categories: List[Dict[str, Any]] = []
-        
+        model_config = ConfigDict(extra="forbid")
+
+        categories: List['Category']
+
     class NewsletterConfig(BaseModel):
         """Configuration for newsletter style and context"""
         name: str
@@ -31,14 +61,16 @@ class WriterBase(OpenAIAgent):
         custom_instructions: Optional[str] = None
 
     newsletter_config: NewsletterConfig
+    cache_dir: Optional[str] = None
 
     def __init__(
         self,
-        newsletter_config: Optional[NewsletterConfig] = None
+        newsletter_config: Optional[NewsletterConfig] = None,
+        cache_dir: Optional[str] = None
     ):
-        """Initialize writer with newsletter configuration."""
+        """Initialize writer with newsletter configuration and an optional output cache."""
         config = newsletter_config or self.get_default_config()
-        super().__init__(newsletter_config=config)
+        super().__init__(newsletter_config=config, cache_dir=cache_dir)
 
     @staticmethod
     def get_default_config() -> 'WriterBase.NewsletterConfig':
@@ -52,39 +84,80 @@ class WriterBase(OpenAIAgent):
         )
 
     @staticmethod
-    def parse_content_output(response: Union[Dict[str, Any], 'WriterBase.ContentOutput']) -> str:
-        """Parse the structured content output into a string format"""
-        print("\nDebug - Raw response type:", type(response))
-        print("\nDebug - Raw response:", response)
-        
-        # Convert Pydantic model to dict if needed
-        if hasattr(response, 'model_dump'):
-            response_dict = response.model_dump()
-        elif hasattr(response, 'dict'):
-            response_dict = response.dict()
-        else:
-            response_dict = response if isinstance(response, dict) else {}
-            
-        print("\nDebug - Converted response:", response_dict)
-            
-        categories = response_dict.get('categories', [])
-        if not categories:
-            print("\nDebug - No categories found")
-            return "No content categorized"
-            
-        formatted_categories = []
-        for category in categories:
-            items = category.get('items', [])
-            formatted_items = [
-                f"\n  - {item.get('summary', 'No summary')} ({item.get('links', ['No link'])[0]})"
-                for item in items
-            ]
-            formatted_categories.append(
-                f"\n{category.get('name', 'Uncategorized')}:{''.join(formatted_items)}"
+    def parse_content_output(response: 'WriterBase.ContentOutput') -> str:
+        """Alias of `render_text`, kept for existing callers."""
+        return WriterBase.render_text(response)
+
+    @staticmethod
+    def render_text(output: 'WriterBase.ContentOutput') -> str:
+        """Render categorized content as an indented plain-text list."""
+        parts = []
+        for category in output.categories:
+            parts.append(f"\n{category.name}:")
+            parts.extend(
+                f"\n  - {item.summary} ({item.primary_link})"
+                for item in category.ordered_items
+            )
+            parts.append("\n")
+        return "".join(parts).rstrip("\n") or "No content categorized"
+
+    @staticmethod
+    def render_markdown(output: 'WriterBase.ContentOutput') -> str:
+        """Render categorized content as newsletter markdown in a single pass."""
+        parts = []
+        for category in output.categories:
+            parts.append(f"## {category.name}\n\n")
+            parts.extend(
+                f"- {item.summary} ([link]({item.primary_link}))\n"
+                if item.links else f"- {item.summary}\n"
+                for item in category.ordered_items
             )
-        result = "\n".join(formatted_categories)
-        print("\nDebug - Formatted result:", result)
-        return result or "No content categorized"
+            parts.append("\n")
+        return "".join(parts).rstrip("\n")
+
+    @staticmethod
+    def render_html(output: 'WriterBase.ContentOutput') -> str:
+        """Render categorized content as newsletter HTML in a single pass."""
+        parts = []
+        for category in output.categories:
+            parts.append(f"<h2>{escape(category.name)}</h2>\n<ul>\n")
+            parts.extend(
+                f'<li>{escape(item.summary)} <a href="{escape(item.primary_link)}">link</a></li>\n'
+                if item.links else f"<li>{escape(item.summary)}</li>\n"
+                for item in category.ordered_items
+            )
+            parts.append("</ul>\n")
+        return "".join(parts)
+
+    @staticmethod
+    def dump_content_output(output: 'WriterBase.ContentOutput', path: Optional[str] = None) -> bytes:
+        """Serialize content output to JSON bytes, optionally writing them to `path`.
+
+        The file is written to a temporary sibling and moved into place, so readers
+        never see a partially written file.
+        """
+        data = output.model_dump_json().encode()
+        if path:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        return data
+
+    @staticmethod
+    def load_content_output(data: Union[str, bytes]) -> 'WriterBase.ContentOutput':
+        """Validate JSON produced by `dump_content_output` (or the LLM) without a dict round-trip."""
+        return WriterBase.ContentOutput.model_validate_json(data)
+
+    @staticmethod
+    def load_content_output_file(path: str) -> 'WriterBase.ContentOutput':
+        """Load content output previously written by `dump_content_output`."""
+        with open(path, "rb") as f:
+            return WriterBase.load_content_output(f.read())
 
     def process_discord_content(self, messages: List[Dict[str, Any]]) -> str:
         """Format Discord messages for LLM processing."""
@@ -121,10 +194,14 @@ class WriterBase(OpenAIAgent):
         return self.newsletter_config.custom_instructions or "N/A"
 
 class Writer(WriterBase):
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        after=collect_errors(ValidationError),
+    )
     @openai.call(
         "gpt-4o-mini",
         response_model=WriterBase.ContentOutput,
-        output_parser=WriterBase.parse_content_output,
         stream=False,
         json_mode=True
     )
@@ -163,7 +240,9 @@ class Writer(WriterBase):
         ADDITIONAL INSTRUCTIONS:
         {self._format_custom_instructions}
         
-        USER: Analyze and categorize this content into the JSON format specified above:
+        USER:
+        {previous_errors}
+        Analyze and categorize this content into the JSON format specified above:
         {content}
         """
     )
@@ -172,18 +251,45 @@ class Writer(WriterBase):
         content: str, 
         *, 
         errors: List[ValidationError] | None = None
-    ) -> Dict[str, Any]:
+    ) -> openai.OpenAIDynamicConfig:
         """Process content into categorized sections."""
         print("\nProcessing with gpt-4o-mini...")
-        # Return empty dict to let the OpenAI decorator handle the response
-        return {}
+        return {
+            "computed_fields": {
+                "previous_errors": f"Previous Errors: {errors}" if errors else None
+            }
+        }
+
+    def _cache_path(self, prompt: str) -> Optional[str]:
+        """Path of the cached output for `prompt` under the current configuration."""
+        if not self.cache_dir:
+            return None
+        key = hashlib.sha256(
+            (self.newsletter_config.model_dump_json() + prompt).encode()
+        ).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
 
-    def run(self, prompt: str) -> Dict[str, Any]:
-        """Run the agent and return the response directly."""
+    def run(self, prompt: str) -> WriterBase.ContentOutput:
+        """Run the agent and return the validated content output.
+
+        When `cache_dir` is set, outputs are cached as JSON keyed by the prompt and
+        newsletter configuration, and repeated runs load them instead of calling the LLM.
+        """
         print("\nDebug - Starting run with prompt:", prompt[:100], "...")
         try:
+            cache_path = self._cache_path(prompt)
+            if cache_path and os.path.exists(cache_path):
+                print("\nDebug - Loading cached response:", cache_path)
+                try:
+                    return self.load_content_output_file(cache_path)
+                except ValidationError:
+                    print("\nDebug - Ignoring invalid cache entry:", cache_path)
+
             response = self._step(prompt)
             print("\nDebug - Got response:", response)
+            if cache_path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self.dump_content_output(response, cache_path)
             return response
         except Exception as e:
             print(f"\nError during run: {str(e)}")
@@ -194,7 +300,7 @@ class Writer(WriterBase):
         token: str,
         channel_id: int,
         days: int = 7
-    ) -> Dict[str, Any]:
+    ) -> WriterBase.ContentOutput:
         """Process Discord content into categorized sections."""
         try:
             print("FETCHING CONTENT...")
@@ -206,7 +312,7 @@ class Writer(WriterBase):
             
             if not messages:
                 print("No messages found in the specified timeframe")
-                return {"categories": []}
+                return WriterBase.ContentOutput(categories=[])
             
             print(f"PROCESSING {len(messages)} MESSAGES...")
             formatted_content = self.process_discord_content(messages)
@@ -225,11 +331,15 @@ class Writer(WriterBase):
             await asyncio.sleep(0)  # Allow event loop to process pending closures
 
 if __name__ == "__main__":
-    import os
-    import json
     import asyncio
+    import argparse
     from dotenv import load_dotenv
-    
+    from tools.profiling import add_profiling_args, profile_run
+
+    parser = argparse.ArgumentParser(description="Writer Agent Demo")
+    add_profiling_args(parser)
+    args = parser.parse_args()
+
     load_dotenv()
     TOKEN = os.getenv('DISCORD_BOT_TOKEN')
     CHANNEL_ID = int(os.getenv('DISCORD_CHANNEL_ID'))
@@ -293,10 +403,11 @@ if __name__ == "__main__":
             result = writer.run(formatted_content)
             
             print("\nFormatted Result:")
-            print(json.dumps(result, indent=2))
+            print(writer.render_markdown(result))
 
         except Exception as e:
             print(f"\nError occurred: {str(e)}")
             raise
 
-    asyncio.run(main()) 
\ No newline at end of file
+    with profile_run(args, "writer"):
+        asyncio.run(main()) 
\ No newline at end of file
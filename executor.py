@@ -1,9 +1,13 @@
 import os
+import time
+from typing import Any, Dict
 from dotenv import load_dotenv; load_dotenv()
 from mirascope.integrations.tenacity import collect_errors
 from mirascope.core import openai, prompt_template
 from pydantic import BaseModel, ValidationError
-from tenacity import retry, wait_exponential
+from tenacity import (
+    RetryError, retry, stop_after_attempt, stop_before_delay, wait_exponential
+)
 from base import OpenAIAgent
 from agents.researcher import Researcher
 
@@ -11,22 +15,58 @@ from agents.researcher import Researcher
 class AgentExecutorBase(OpenAIAgent):
     researcher: Researcher = Researcher()
     num_paragraphs: int = 4
+    max_revision_rounds: int = 3
+    revision_token_budget: int = 20_000
+    revision_time_budget: float = 120.0
+    outline_chars: int = 80
 
     class InitialDraft(BaseModel):
         draft: str
         critique: str
 
+    class RevisedParagraph(BaseModel):
+        index: int
+        text: str
+
+    class Revision(BaseModel):
+        paragraphs: list["RevisedParagraph"]
+        critique: str
+        targets: list[int] = []
+        done: bool = False
+
     @staticmethod
     def parse_initial_draft(response: InitialDraft) -> str:
         return f"Draft: {response.draft}\nCritique: {response.critique}"
 
+    @staticmethod
+    def split_paragraphs(draft: str) -> list[str]:
+        """Split a draft into its non-empty paragraphs.
+
+        Paragraphs are separated by blank lines; drafts without any blank lines are
+        split on single newlines instead.
+        """
+        separator = "\n\n" if "\n\n" in draft.strip() else "\n"
+        return [p.strip() for p in draft.split(separator) if p.strip()]
+
+    def outline(self, paragraphs: list[str]) -> str:
+        """Summarize every paragraph as its index and opening words."""
+        return "\n".join(
+            f"[{index}] {text[:self.outline_chars]}"
+            + ("..." if len(text) > self.outline_chars else "")
+            for index, text in enumerate(paragraphs)
+        )
+
+    @staticmethod
+    def estimate_tokens(*texts: str) -> int:
+        """Rough token count (~4 characters per token) used for budgeting."""
+        return sum(len(text) for text in texts) // 4
+
     @retry(
+        stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10),
         after=collect_errors(ValidationError),
     )
-    @openai.call(
-        "gpt-4o-mini", response_model=InitialDraft, output_parser=parse_initial_draft
-    )
+    @openai.call("gpt-4o-mini", response_model=InitialDraft)
     @prompt_template(
         """
         SYSTEM:
@@ -43,6 +83,8 @@ class AgentExecutorBase(OpenAIAgent):
         request that additional research be conducted by the researcher. Make sure that
         your request is specific, clear, and concise.
 
+        Write the draft as exactly {self.num_paragraphs} paragraphs separated by blank lines.
+
         MESSAGES: {self.history}
         USER:
         {previous_errors}
@@ -67,3 +109,161 @@ class AgentExecutorBase(OpenAIAgent):
                 "previous_errors": f"Previous Errors: {errors}" if errors else None
             }
         }
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        after=collect_errors(ValidationError),
+    )
+    @openai.call("gpt-4o-mini", response_model=Revision)
+    @prompt_template(
+        """
+        SYSTEM:
+        You are revising a blog post of {paragraph_count} paragraphs, numbered
+        from 0, based on a critique of the current version. You are given an outline
+        with the opening words of every paragraph, and the full text of the paragraphs
+        that either changed in the last round or are targeted by the critique. Only
+        rewrite paragraphs whose full text you are given.
+
+        Return each paragraph you rewrite along with its index. Then write a fresh
+        critique of the revised post, list the indices of the paragraphs that critique
+        asks to change in `targets`, and set `done` to true if the post needs no
+        further changes.
+
+        USER:
+        {previous_errors}
+        Critique: {critique}
+
+        Outline:
+        {outline}
+
+        Paragraphs to revise:
+        {open_paragraphs}
+        """
+    )
+    def _revise_draft(
+        self,
+        critique: str,
+        outline: str,
+        open_paragraphs: dict[int, str],
+        paragraph_count: int,
+        *,
+        errors: list[ValidationError] | None = None,
+    ) -> openai.OpenAIDynamicConfig:
+        """Revises the open paragraphs of a draft according to its critique.
+
+        Args:
+            critique: The critique of the current version of the draft.
+            outline: The opening words of every paragraph, for context.
+            open_paragraphs: The paragraphs the model may rewrite, keyed by their index
+                in the draft.
+            paragraph_count: The number of paragraphs in the current draft.
+
+        Returns:
+            The rewritten paragraphs along with a new critique and its targets.
+        """
+        return {
+            "computed_fields": {
+                "previous_errors": f"Previous Errors: {errors}" if errors else None,
+                "open_paragraphs": "\n\n".join(
+                    f"[{index}] {text}" for index, text in sorted(open_paragraphs.items())
+                ),
+            }
+        }
+
+    def revise(self, initial: InitialDraft) -> InitialDraft:
+        """Runs bounded critique -> revise rounds over an initial draft.
+
+        Each round sends the latest critique, a short outline of every paragraph, and
+        the full text of only the paragraphs that changed in the previous round or
+        that the critique targets, so the prompt stays roughly constant in size
+        instead of growing with the full draft and history. Revision stops once the
+        model reports it is done, no paragraphs change, or the round, token, or time
+        budget runs out. The budgets only cover the revision rounds, not the initial
+        draft; retries within a round are cut short once the time budget is spent.
+
+        Args:
+            initial: The initial draft and its self-critique.
+
+        Returns:
+            The final draft along with its most recent critique.
+        """
+        paragraphs = self.split_paragraphs(initial.draft)
+        critique = initial.critique
+        open_indices = set(range(len(paragraphs)))
+        tokens_used = 0
+        deadline = time.monotonic() + self.revision_time_budget
+
+        for round_num in range(1, self.max_revision_rounds + 1):
+            outline = self.outline(paragraphs)
+            open_paragraphs = {index: paragraphs[index] for index in sorted(open_indices)}
+            prompt_tokens = self.estimate_tokens(
+                critique, outline, *open_paragraphs.values()
+            )
+            if tokens_used + prompt_tokens > self.revision_token_budget:
+                print("REVISION TOKEN BUDGET EXHAUSTED")
+                break
+            if time.monotonic() >= deadline:
+                print("REVISION TIME BUDGET EXHAUSTED")
+                break
+
+            print(f"REVISING (ROUND {round_num})...")
+            revise_draft = type(self)._revise_draft.retry_with(
+                stop=stop_after_attempt(3)
+                | stop_before_delay(deadline - time.monotonic())
+            )
+            try:
+                revision = revise_draft(
+                    self, critique, outline, open_paragraphs, len(paragraphs)
+                )
+            except RetryError as e:
+                if e.last_attempt.attempt_number >= 3:
+                    raise
+                print("REVISION TIME BUDGET EXHAUSTED")
+                break
+            tokens_used += prompt_tokens + self.estimate_tokens(
+                revision.critique, *(p.text for p in revision.paragraphs)
+            )
+
+            changed = set()
+            for paragraph in revision.paragraphs:
+                text = paragraph.text.strip()
+                if paragraph.index in open_paragraphs and text != paragraphs[paragraph.index]:
+                    paragraphs[paragraph.index] = text
+                    changed.add(paragraph.index)
+
+            critique = revision.critique
+            if revision.done or not changed:
+                print("REVISION CONVERGED!")
+                break
+            open_indices = changed | {
+                index for index in revision.targets if 0 <= index < len(paragraphs)
+            }
+
+        return self.InitialDraft(draft="\n\n".join(paragraphs), critique=critique)
+
+    def write_and_revise(self, prompt: str) -> InitialDraft:
+        """Writes an initial draft for `prompt` and refines it with `revise`."""
+        print("WRITING INITIAL DRAFT...")
+        return self.revise(self._write_initial_draft(prompt))
+
+
+class AgentExecutor(AgentExecutorBase):
+    def _step(self, prompt: str) -> Dict[str, Any]:
+        return self.write_and_revise(prompt).model_dump()
+
+
+if __name__ == "__main__":
+    import argparse
+    from tools.profiling import add_profiling_args, profile_run
+
+    parser = argparse.ArgumentParser(description="Write and revise a blog post draft")
+    parser.add_argument("prompt", help="topic and guidance for the blog post")
+    add_profiling_args(parser)
+    args = parser.parse_args()
+
+    with profile_run(args, "executor"):
+        result = AgentExecutor().run(args.prompt)
+
+    print(f"\nDraft:\n{result['draft']}")
+    print(f"\nCritique:\n{result['critique']}")
@@ -182,6 +182,16 @@ def get_available_channels(token: str) -> None:
 
 # Example usage
 if __name__ == "__main__":
+    import argparse
+    try:
+        from tools.profiling import add_profiling_args, profile_run
+    except ModuleNotFoundError:  # run as a script from inside tools/
+        from profiling import add_profiling_args, profile_run
+
+    parser = argparse.ArgumentParser(description="Discord Content Reader Demo")
+    add_profiling_args(parser)
+    args = parser.parse_args()
+
     load_dotenv()
     TOKEN = os.getenv('DISCORD_BOT_TOKEN')
     CHANNEL_ID = int(os.getenv('DISCORD_CHANNEL_ID'))
@@ -227,7 +237,8 @@ if __name__ == "__main__":
     
     try:
         print("\nStarting main loop...")
-        asyncio.run(main())
+        with profile_run(args, "discord_reader"):
+            asyncio.run(main())
     except KeyboardInterrupt:
         print("\nShutting down gracefully...")
     except Exception as e:
@@ -0,0 +1,228 @@
+"""
+Message Archive
+
+A module for exporting processed Discord messages to a columnar Arrow IPC file
+and scanning them back with memory-mapped, vectorized aggregates.
+Author and domain columns are dictionary-encoded so repeated values cost one index.
+"""
+
+import json
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+URL_PATTERN = re.compile(r"https?://[^\s<>()\"']+")
+
+DICTIONARY_STRING = pa.dictionary(pa.int32(), pa.string())
+
+ARCHIVE_SCHEMA = pa.schema([
+    ('message_id', pa.string()),
+    ('timestamp', pa.timestamp('us', tz='UTC')),
+    ('author', DICTIONARY_STRING),
+    ('author_id', DICTIONARY_STRING),
+    ('content', pa.string()),
+    ('domains', pa.list_(DICTIONARY_STRING)),
+    ('attachments', pa.list_(pa.string())),
+    ('embeds', pa.string()),
+    ('is_pinned', pa.bool_()),
+    ('reference', pa.string()),
+])
+
+
+def extract_domains(message: Dict[str, Any]) -> List[str]:
+    """Collect the unique link domains referenced by a processed message.
+
+    Args:
+        message (Dict[str, Any]): Message in the `_process_message` format
+
+    Returns:
+        List[str]: Domains in order of first appearance, without a `www.` prefix
+    """
+    urls = URL_PATTERN.findall(message.get('content') or '')
+    urls.extend(message.get('attachments') or [])
+    urls.extend(embed['url'] for embed in message.get('embeds') or [] if 'url' in embed)
+
+    domains = {}
+    for url in urls:
+        try:
+            host = urlparse(url).hostname
+        except ValueError:
+            continue
+        if host:
+            domains.setdefault(host.removeprefix('www.'), None)
+    return list(domains)
+
+
+def _dictionary_column(values: List[str]) -> pa.DictionaryArray:
+    """Dictionary-encode a list of strings."""
+    return pa.array(values, type=pa.string()).dictionary_encode()
+
+
+class MessageArchive:
+    """Read and write message history as a memory-mapped columnar archive."""
+
+    @staticmethod
+    def to_table(messages: Iterable[Dict[str, Any]]) -> pa.Table:
+        """Convert processed messages into a columnar table.
+
+        Args:
+            messages (Iterable[Dict[str, Any]]): Messages in the `_process_message` format
+
+        Returns:
+            pa.Table: Table following `ARCHIVE_SCHEMA`
+        """
+        columns = {name: [] for name in ARCHIVE_SCHEMA.names}
+        domain_offsets = [0]
+        flat_domains = []
+        for msg in messages:
+            columns['message_id'].append(msg['message_id'])
+            columns['timestamp'].append(msg['timestamp'])
+            columns['author'].append(msg['author'])
+            columns['author_id'].append(msg['author_id'])
+            columns['content'].append(msg['content'])
+            columns['attachments'].append(msg.get('attachments') or [])
+            columns['embeds'].append(json.dumps(msg.get('embeds') or []))
+            columns['is_pinned'].append(bool(msg.get('is_pinned')))
+            columns['reference'].append(msg.get('reference'))
+            flat_domains.extend(extract_domains(msg))
+            domain_offsets.append(len(flat_domains))
+
+        arrays = {
+            name: pa.array(values, type=ARCHIVE_SCHEMA.field(name).type)
+            for name, values in columns.items()
+            if name not in ('author', 'author_id', 'domains')
+        }
+        arrays['author'] = _dictionary_column(columns['author'])
+        arrays['author_id'] = _dictionary_column(columns['author_id'])
+        arrays['domains'] = pa.ListArray.from_arrays(
+            pa.array(domain_offsets, type=pa.int32()),
+            _dictionary_column(flat_domains),
+        )
+        return pa.Table.from_arrays(
+            [arrays[name] for name in ARCHIVE_SCHEMA.names], schema=ARCHIVE_SCHEMA
+        )
+
+    @staticmethod
+    def write(messages: Iterable[Dict[str, Any]], path: str) -> int:
+        """Export processed messages to an Arrow IPC archive file.
+
+        Args:
+            messages (Iterable[Dict[str, Any]]): Messages in the `_process_message` format
+            path (str): Destination file path
+
+        Returns:
+            int: Number of messages written
+        """
+        table = MessageArchive.to_table(messages)
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, ARCHIVE_SCHEMA) as writer:
+                writer.write_table(table)
+        return table.num_rows
+
+    @staticmethod
+    def read_table(path: str) -> pa.Table:
+        """Memory-map an archive file without copying its columns into memory.
+
+        Args:
+            path (str): Archive file path
+
+        Returns:
+            pa.Table: Zero-copy table backed by the mapped file
+        """
+        with pa.memory_map(path, 'r') as source:
+            return pa.ipc.open_file(source).read_all()
+
+    @staticmethod
+    def read_messages(path: str) -> List[Dict[str, Any]]:
+        """Import an archive back into the `_process_message` format.
+
+        Args:
+            path (str): Archive file path
+
+        Returns:
+            List[Dict[str, Any]]: Processed messages in archive order
+        """
+        table = MessageArchive.read_table(path).drop_columns(['domains'])
+        messages = table.to_pylist()
+        for msg in messages:
+            msg['embeds'] = json.loads(msg['embeds'])
+        return messages
+
+    @staticmethod
+    def filter_period(
+        table: pa.Table,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> pa.Table:
+        """Restrict a table to messages sent within `[start, end)`.
+
+        Args:
+            table (pa.Table): Archive table
+            start (Optional[datetime]): Inclusive lower bound, timezone-aware
+            end (Optional[datetime]): Exclusive upper bound, timezone-aware
+
+        Returns:
+            pa.Table: Filtered table
+        """
+        timestamps = table['timestamp']
+        if start is not None:
+            table = table.filter(pc.greater_equal(timestamps, pa.scalar(start, timestamps.type)))
+            timestamps = table['timestamp']
+        if end is not None:
+            table = table.filter(pc.less(timestamps, pa.scalar(end, timestamps.type)))
+        return table
+
+    @staticmethod
+    def _top_values(values: pa.ChunkedArray, n: int) -> List[tuple]:
+        """Return the `n` most frequent values with their counts."""
+        if len(values) == 0:
+            return []
+        counts = pc.value_counts(values.combine_chunks())
+        order = pc.array_sort_indices(counts.field('counts'), order='descending')
+        top = counts.take(order[:n])
+        return [(row['values'], row['counts']) for row in top.to_pylist()]
+
+    @staticmethod
+    def top_authors(table: pa.Table, n: int = 10) -> List[tuple]:
+        """Find the most active authors in an archive table.
+
+        Authors are grouped by `author_id`, so display name changes do not split
+        one person across several rows; each row carries the latest display name.
+
+        Args:
+            table (pa.Table): Archive table, optionally narrowed with `filter_period`
+            n (int): Number of authors to return
+
+        Returns:
+            List[tuple]: `(author, message_count)` pairs, most active first
+        """
+        if table.num_rows == 0:
+            return []
+        authors = pa.table({
+            'author_id': table['author_id'].cast(pa.string()),
+            'author': table['author'].cast(pa.string()),
+            'timestamp': table['timestamp'],
+        }).sort_by('timestamp')
+        grouped = authors.group_by('author_id', use_threads=False).aggregate([
+            ('author', 'count'),
+            ('author', 'last'),
+        ])
+        top = grouped.sort_by([('author_count', 'descending')]).slice(0, n)
+        return list(zip(top['author_last'].to_pylist(), top['author_count'].to_pylist()))
+
+    @staticmethod
+    def top_domains(table: pa.Table, n: int = 10) -> List[tuple]:
+        """Find the most linked domains in an archive table.
+
+        Args:
+            table (pa.Table): Archive table, optionally narrowed with `filter_period`
+            n (int): Number of domains to return
+
+        Returns:
+            List[tuple]: `(domain, message_count)` pairs, most linked first
+        """
+        return MessageArchive._top_values(pc.list_flatten(table['domains']), n)
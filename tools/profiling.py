@@ -0,0 +1,186 @@
+"""
+Run Profiler
+
+Opt-in CPU and memory profiling for pipeline entry points.
+Wraps a run in cProfile and tracemalloc, splits wall time into CPU time and
+wait time (Discord paging, LLM calls, other I/O), and writes the results to disk.
+"""
+
+import argparse
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from contextlib import nullcontext
+from datetime import datetime
+from typing import ContextManager, Optional
+
+# Built-ins that only block while the event loop (or a sync client) waits on the
+# network: selector, socket and SSL socket methods, plus select() and sleep()
+WAIT_FUNCTION_PATTERN = re.compile(
+    r"[<{]method '\w+' of "
+    r"'(?:select\.(?:epoll|poll|devpoll|kqueue)|_socket\.socket|_ssl\._SSLSocket)' objects[>}]"
+    r"|[<{]built-in method (?:select\.select|time\.sleep)[>}]"
+)
+
+
+class RunProfiler:
+    """Context manager that profiles everything run inside it."""
+
+    def __init__(
+        self,
+        output_dir: str,
+        name: str,
+        top_n: int = 25,
+        trace_frames: int = 1,
+        trace_memory: bool = True
+    ):
+        """Configure where and how a run is profiled.
+
+        Args:
+            output_dir (str): Directory for the profile dumps and summary
+            name (str): Prefix for the output file names, usually the entry point
+            top_n (int): Number of functions and allocation sites in the summary
+            trace_frames (int): Stack depth recorded by tracemalloc per allocation
+            trace_memory (bool): Whether to trace allocations; tracemalloc slows down
+                the run, so disable it to time the run with cProfile alone
+        """
+        self.output_dir = output_dir
+        self.name = name
+        self.top_n = top_n
+        self.trace_frames = trace_frames
+        self.trace_memory = trace_memory
+        self.profiler = cProfile.Profile()
+        self.summary: Optional[str] = None
+
+    def __enter__(self) -> 'RunProfiler':
+        if self.trace_memory:
+            tracemalloc.start(self.trace_frames)
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler.disable()
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.process_time() - self._cpu_start
+        snapshot, peak = None, 0
+        if self.trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        self._write(wall, cpu, peak, snapshot)
+
+    def _io_wait_time(self, stats: pstats.Stats) -> float:
+        """Sum the time spent inside blocking selector, socket, SSL and sleep calls."""
+        return sum(
+            tottime
+            for (filename, _, func), (_, _, tottime, _, _) in stats.stats.items()
+            if filename == '~' and WAIT_FUNCTION_PATTERN.search(func)
+        )
+
+    def _write(
+        self,
+        wall: float,
+        cpu: float,
+        peak: int,
+        snapshot: Optional[tracemalloc.Snapshot]
+    ) -> None:
+        """Write the profile dump, allocation snapshot and top-N summary."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        stem = os.path.join(
+            self.output_dir, f"{self.name}-{datetime.now():%Y%m%d-%H%M%S}"
+        )
+        self.profiler.dump_stats(f"{stem}.prof")
+        if snapshot:
+            snapshot.dump(f"{stem}.tracemalloc")
+
+        buffer = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=buffer)
+        io_wait = self._io_wait_time(stats)
+
+        buffer.write(f"Profile of {self.name}\n")
+        buffer.write(f"Wall time:    {wall:9.3f}s\n")
+        buffer.write(f"CPU time:     {cpu:9.3f}s\n")
+        buffer.write(f"Wait time:    {max(wall - cpu, 0.0):9.3f}s (wall - CPU)\n")
+        buffer.write(f"  I/O blocked:{io_wait:9.3f}s (selector, socket, SSL and sleep calls)\n")
+        if snapshot:
+            buffer.write(f"Peak memory:  {peak / 1024 / 1024:9.2f} MiB\n")
+            buffer.write(
+                "Note: tracemalloc was active, so wall and CPU times include its "
+                "overhead; rerun with --profile-no-memory for timing only.\n"
+            )
+        buffer.write("\n")
+
+        buffer.write(f"Top {self.top_n} functions by cumulative time:\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        buffer.write(f"Top {self.top_n} functions by own time:\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top_n)
+
+        if snapshot:
+            buffer.write(f"Top {self.top_n} allocation sites:\n")
+            snapshot = snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ])
+            for stat in snapshot.statistics('lineno')[:self.top_n]:
+                buffer.write(f"  {stat}\n")
+
+        self.summary = buffer.getvalue()
+        with open(f"{stem}.txt", "w") as f:
+            f.write(self.summary)
+
+        print(self.summary)
+        print(f"Profile written to {stem}.prof (view with snakeviz or flameprof)")
+        if snapshot:
+            print(f"Allocations written to {stem}.tracemalloc")
+
+
+def add_profiling_args(parser: argparse.ArgumentParser) -> None:
+    """Add the opt-in profiling flags to an entry point's argument parser.
+
+    Args:
+        parser (argparse.ArgumentParser): Parser of the entry point
+    """
+    group = parser.add_argument_group("profiling")
+    group.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="profile the run and write CPU/memory profiles to DIR",
+    )
+    group.add_argument(
+        "--profile-top",
+        metavar="N",
+        type=int,
+        default=25,
+        help="number of entries in the profile summary (default: 25)",
+    )
+    group.add_argument(
+        "--profile-no-memory",
+        action="store_true",
+        help="skip tracemalloc so CPU and wall times are not inflated by it",
+    )
+
+
+def profile_run(args: argparse.Namespace, name: str) -> ContextManager:
+    """Return a profiler for the run if `--profile` was passed, else a no-op.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments from `add_profiling_args`
+        name (str): Prefix for the output file names
+
+    Returns:
+        ContextManager: `RunProfiler` or a null context
+    """
+    if not args.profile:
+        return nullcontext()
+    return RunProfiler(
+        args.profile,
+        name,
+        top_n=args.profile_top,
+        trace_memory=not args.profile_no_memory,
+    )